@@ -0,0 +1,107 @@
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# --- WORKER SCALING BENCHMARK ---
+# Starts serve.py with 1, 2, 4... workers on this machine and fires concurrent
+# /chat requests at it. Needs the same .env as main.py.
+#
+#   python bench_workers.py --workers 1 2 4 --requests 200 --concurrency 16
+#
+# Each round gets a fresh cache file and a per-round nonce in every question,
+# so no round reuses answers cached by an earlier one (or by its warm-up).
+# Within a round questions repeat, so most requests are served from the shared
+# cache; use --unique to force every request upstream.
+
+QUESTIONS = [
+    "What is a process?",
+    "Explain virtual memory.",
+    "What is deadlock?",
+    "Define normalization.",
+    "What is a binary search tree?",
+]
+
+def wait_for_server(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2)
+            return True
+        except Exception:
+            time.sleep(0.5)
+    return False
+
+def post_chat(url, question):
+    body = json.dumps({"question": question, "mode": "LECTURE"}).encode("utf-8")
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=120) as resp:
+            resp.read()
+            ok = resp.status == 200
+    except Exception:
+        ok = False
+    return ok, time.perf_counter() - start
+
+def run_round(base_url, n_requests, concurrency, unique, nonce):
+    questions = [
+        f"{QUESTIONS[i % len(QUESTIONS)]} (#{i}) [{nonce}]" if unique else f"{QUESTIONS[i % len(QUESTIONS)]} [{nonce}]"
+        for i in range(n_requests)
+    ]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda q: post_chat(f"{base_url}/chat", q), questions))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(r[1] for r in results)
+    return {
+        "ok": sum(1 for r in results if r[0]),
+        "elapsed": elapsed,
+        "rps": n_requests / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure /chat throughput vs. worker count.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unique", action="store_true", help="Disable cache hits by making every question unique")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"{'workers':>8} {'ok':>6} {'req/s':>8} {'p50(s)':>8} {'p95(s)':>8}")
+
+    for n in args.workers:
+        cache_dir = tempfile.mkdtemp(prefix="bench_cache_")
+        env = dict(
+            os.environ, WEB_CONCURRENCY=str(n), PORT=str(args.port),
+            CACHE_PATH=os.path.join(cache_dir, "shared_cache.sqlite3")
+        )
+        server = subprocess.Popen(
+            [sys.executable, "serve.py"], env=env,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            if not wait_for_server(base_url):
+                print(f"❌ Server with {n} worker(s) did not start.")
+                continue
+            # Warm-up uses its own nonce so it opens connections without seeding answers
+            run_round(base_url, len(QUESTIONS), len(QUESTIONS), args.unique, f"warmup-{uuid.uuid4().hex[:8]}")
+            r = run_round(base_url, args.requests, args.concurrency, args.unique, uuid.uuid4().hex[:8])
+            print(f"{n:>8} {r['ok']:>6} {r['rps']:>8.1f} {r['p50']:>8.2f} {r['p95']:>8.2f}")
+        finally:
+            server.terminate()
+            server.wait()
+            shutil.rmtree(cache_dir, ignore_errors=True)
@@ -0,0 +1,156 @@
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ingestion import ingest_pdf, sanitize_filename
+
+# --- BULK INGESTION CLI ---
+# Non-interactive ingestion of many PDFs at once, using the same core as /upload.
+#
+#   python bulk_ingest.py --dir ./lectures --subject "Operating Systems"
+#   python bulk_ingest.py --manifest semester.csv --jobs 6
+#
+# Manifest is a CSV with a header row: file,subject,chapter
+# (relative paths are resolved against the manifest's folder).
+# Finished files are recorded in the checkpoint, so re-running the same
+# command after a crash only ingests what is left.
+
+DEFAULT_CHECKPOINT = ".ingest_checkpoint.json"
+# Bulk runs are offline, so they can wait out rate limits longer than /upload
+BULK_EMBED_RETRIES = 5
+
+def jobs_from_dir(directory, subject):
+    jobs = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(".pdf"):
+            jobs.append({
+                "file": os.path.join(directory, name),
+                "subject": subject,
+                "chapter": os.path.splitext(name)[0]
+            })
+    return jobs
+
+def jobs_from_manifest(manifest_path):
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    with open(manifest_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            path = row["file"].strip()
+            if not os.path.isabs(path):
+                path = os.path.join(base, path)
+            jobs.append({
+                "file": path,
+                "subject": (row.get("subject") or "General").strip(),
+                "chapter": (row.get("chapter") or "General").strip()
+            })
+    return jobs
+
+def duplicate_names(jobs):
+    """Files that would be stored under the same name (and overwrite each other)."""
+    by_name = {}
+    for job in jobs:
+        by_name.setdefault(sanitize_filename(os.path.basename(job["file"])), []).append(job["file"])
+    return {name: files for name, files in by_name.items() if len(files) > 1}
+
+def file_fingerprint(path):
+    """Cheap identity for a file: a changed PDF (new size/mtime) is ingested again."""
+    st = os.stat(path)
+    return f"{st.st_size}:{int(st.st_mtime)}"
+
+class Checkpoint:
+    """JSON record of finished files, rewritten atomically after every file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = json.load(f).get("done", {})
+
+    def is_done(self, job):
+        entry = self.done.get(os.path.abspath(job["file"]))
+        return entry is not None and entry["fingerprint"] == file_fingerprint(job["file"])
+
+    def mark_done(self, job, result):
+        with self._lock:
+            self.done[os.path.abspath(job["file"])] = {
+                "fingerprint": file_fingerprint(job["file"]),
+                "filename": result["filename"],
+                "chunks": result["chunks"]
+            }
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"done": self.done}, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+def run(jobs, checkpoint, max_jobs):
+    pending = [j for j in jobs if not checkpoint.is_done(j)]
+    skipped = len(jobs) - len(pending)
+    print(f"📚 {len(jobs)} file(s) | ✅ {skipped} already done | 📥 {len(pending)} to ingest | ⚙️  {max_jobs} parallel")
+
+    start = time.time()
+    completed, failed, total_chunks = 0, [], 0
+
+    # The pool size is the global cap on files (and so upstream calls) in flight
+    with ThreadPoolExecutor(max_workers=max_jobs) as pool:
+        futures = {
+            pool.submit(ingest_pdf, j["file"], j["subject"], j["chapter"], embed_retries=BULK_EMBED_RETRIES): j
+            for j in pending
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed.append(job["file"])
+                print(f"   ❌ {os.path.basename(job['file'])}: {e}")
+                continue
+
+            checkpoint.mark_done(job, result)
+            completed += 1
+            total_chunks += result["chunks"]
+            elapsed = time.time() - start
+            print(
+                f"   [{completed + len(failed)}/{len(pending)}] ✅ {result['filename']} "
+                f"({result['chunks']} chunks) | {completed / elapsed * 60:.1f} files/min, "
+                f"{total_chunks / elapsed:.1f} chunks/s"
+            )
+
+    elapsed = time.time() - start
+    print(f"\n🎉 Done in {elapsed:.1f}s: {completed} ingested, {len(failed)} failed, {total_chunks} chunks.")
+    if failed:
+        print("🔁 Re-run the same command to retry the failed files.")
+    return failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest a folder or manifest of PDFs in parallel.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dir", help="Folder of PDFs (chapter = file name)")
+    source.add_argument("--manifest", help="CSV with columns file,subject,chapter")
+    parser.add_argument("--subject", default="General", help="Subject for every file in --dir")
+    parser.add_argument("--jobs", type=int, default=4, help="Max files ingested at the same time")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Resume file (default: %(default)s)")
+    args = parser.parse_args()
+
+    jobs = jobs_from_dir(args.dir, args.subject) if args.dir else jobs_from_manifest(args.manifest)
+    missing = [j["file"] for j in jobs if not os.path.exists(j["file"])]
+    if missing:
+        print(f"❌ File(s) not found: {', '.join(missing)}")
+        sys.exit(1)
+
+    duplicates = duplicate_names(jobs)
+    if duplicates:
+        print("❌ These files would be stored under the same name and overwrite each other:")
+        for name, files in duplicates.items():
+            print(f"   {name}: {', '.join(files)}")
+        print("💡 Rename them (e.g. os_lec1.pdf, dbms_lec1.pdf) and run again.")
+        sys.exit(1)
+
+    failed = run(jobs, Checkpoint(args.checkpoint), max(1, args.jobs))
+    sys.exit(1 if failed else 0)
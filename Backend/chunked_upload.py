@@ -0,0 +1,297 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+
+from shared_cache import SharedCache
+from ingestion import cache, ingest_pdf, sanitize_filename
+
+# --- RESUMABLE CHUNKED UPLOADS ---
+# Protocol (endpoints live in main.py):
+#   1. POST /upload/init                 -> upload_id, part_size, missing_parts
+#   2. PUT  /upload/{id}/parts/{n}       -> raw bytes of part n (1-based)
+#   3. POST /upload/{id}/commit          -> starts processing / reports status
+#
+# Parts are staged on local disk, one file per part, so after a network drop
+# the client only re-sends what `missing_parts` lists. All state lives on disk
+# (and finished results in the shared cache), so any uvicorn worker can serve
+# any request of the same upload.
+
+STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR", os.path.join(os.path.dirname(__file__), "uploads"))
+PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", str(5 * 1024 * 1024)))
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(500 * 1024 * 1024)))
+STAGING_TTL_SECONDS = int(os.getenv("UPLOAD_STAGING_TTL_SECONDS", str(24 * 3600)))
+# The worker processing an upload touches its lock every HEARTBEAT seconds; a
+# lock left untouched for LOCK_STALE_SECONDS means that worker died mid-ingest.
+LOCK_HEARTBEAT_SECONDS = 30
+LOCK_STALE_SECONDS = int(os.getenv("UPLOAD_LOCK_STALE_SECONDS", "300"))
+
+class UploadError(Exception):
+    """Raised for bad upload requests; main.py turns it into an HTTP error."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+# --- 1. STAGING HELPERS ---
+def upload_id_for(sha256, filename, subject, chapter):
+    # Same bytes + same labels => same upload, which is what makes both
+    # resuming and the "already ingested" short-circuit work.
+    return SharedCache.make_key(sha256.lower(), filename, subject, chapter)[:32]
+
+def _upload_dir(upload_id):
+    if not upload_id.isalnum():
+        raise UploadError("Invalid upload id", 400)
+    return os.path.join(STAGING_DIR, upload_id)
+
+def _part_path(upload_id, part_number):
+    return os.path.join(_upload_dir(upload_id), f"part_{part_number:05d}")
+
+def _lock_path(upload_id):
+    return os.path.join(_upload_dir(upload_id), "processing.lock")
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _save_state(state):
+    path = os.path.join(_upload_dir(state["upload_id"]), "state.json")
+    _write_atomic(path, json.dumps(state).encode("utf-8"))
+
+def load_state(upload_id):
+    path = os.path.join(_upload_dir(upload_id), "state.json")
+    if not os.path.exists(path):
+        raise UploadError("Unknown upload id. Call /upload/init again.", 404)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def missing_parts(state):
+    return [
+        n for n in range(1, state["total_parts"] + 1)
+        if not os.path.exists(_part_path(state["upload_id"], n))
+    ]
+
+def summarize(state):
+    return {
+        "upload_id": state["upload_id"],
+        "status": state["status"],
+        "part_size": state["part_size"],
+        "total_parts": state["total_parts"],
+        "missing_parts": missing_parts(state) if state["status"] in ("receiving", "failed") else [],
+        "result": state.get("result"),
+        "error": state.get("error")
+    }
+
+def cleanup_stale_uploads():
+    """Removes staging folders nobody has touched for STAGING_TTL_SECONDS."""
+    if not os.path.isdir(STAGING_DIR):
+        return
+    cutoff = time.time() - STAGING_TTL_SECONDS
+    for name in os.listdir(STAGING_DIR):
+        path = os.path.join(STAGING_DIR, name)
+        if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+
+# --- 2. PROTOCOL STEPS ---
+def init_upload(filename, subject, chapter, size, sha256):
+    safe_filename = sanitize_filename(filename)
+    if not safe_filename.lower().endswith(".pdf"):
+        raise UploadError("Only PDF files are supported")
+    if size <= 0 or size > MAX_UPLOAD_SIZE:
+        raise UploadError(f"File size must be between 1 byte and {MAX_UPLOAD_SIZE} bytes")
+    if len(sha256) != 64:
+        raise UploadError("sha256 must be a 64-character hex digest")
+
+    upload_id = upload_id_for(sha256, safe_filename, subject, chapter)
+
+    # Same bytes already ingested with the same labels: nothing to send
+    existing = cache.get("uploads", upload_id)
+    if existing is not None:
+        return {
+            "upload_id": upload_id, "status": "done", "part_size": PART_SIZE,
+            "total_parts": 0, "missing_parts": [], "result": existing, "error": None
+        }
+
+    cleanup_stale_uploads()
+    os.makedirs(_upload_dir(upload_id), exist_ok=True)
+    try:
+        state = load_state(upload_id)
+    except UploadError:
+        state = None
+
+    # The cache is the only record of "already ingested": if it no longer has
+    # this upload (evicted, or cleared by an admin delete/reset), start over.
+    if state is None or state["status"] == "done":
+        state = {
+            "upload_id": upload_id,
+            "filename": safe_filename,
+            "subject": subject,
+            "chapter": chapter,
+            "size": size,
+            "sha256": sha256.lower(),
+            "part_size": PART_SIZE,
+            "total_parts": -(-size // PART_SIZE),
+            "status": "receiving"
+        }
+        _save_state(state)
+    return summarize(state)
+
+def write_part(upload_id, part_number, data):
+    state = load_state(upload_id)
+    if state["status"] in ("processing", "done"):
+        return summarize(state)
+    if not 1 <= part_number <= state["total_parts"]:
+        raise UploadError(f"Part number must be between 1 and {state['total_parts']}")
+
+    is_last = part_number == state["total_parts"]
+    expected = state["size"] - state["part_size"] * (state["total_parts"] - 1) if is_last else state["part_size"]
+    if len(data) != expected:
+        raise UploadError(f"Part {part_number} should be {expected} bytes, got {len(data)}")
+
+    _write_atomic(_part_path(upload_id, part_number), data)
+    os.utime(_upload_dir(upload_id))  # keep active uploads away from cleanup
+    return summarize(state)
+
+def _lock_is_stale(lock_path):
+    try:
+        return time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS
+    except FileNotFoundError:
+        return False
+
+def _take_over_stale_lock(lock_path):
+    """Removes a dead worker's lock. Only one caller can win the rename."""
+    stale_path = f"{lock_path}.{uuid.uuid4().hex}.stale"
+    try:
+        os.rename(lock_path, stale_path)
+    except FileNotFoundError:
+        return
+    if not _lock_is_stale(stale_path):
+        # Lost a race and grabbed a fresh lock instead: put it back
+        try:
+            os.link(stale_path, lock_path)
+        except FileExistsError:
+            pass
+    os.remove(stale_path)
+
+def claim_processing(upload_id):
+    """Moves a fully received upload to 'processing'.
+
+    Returns a random lock token for exactly one caller (None for the rest);
+    pass it to process_upload so it can tell whether it still owns the lock.
+
+    An upload stuck in 'processing' whose lock has gone stale is claimed again.
+    """
+    state = load_state(upload_id)
+    lock_path = _lock_path(upload_id)
+    if state["status"] == "processing" and (not os.path.exists(lock_path) or _lock_is_stale(lock_path)):
+        print(f"⚠️ Taking over stale processing lock for {state['filename']}")
+        _take_over_stale_lock(lock_path)
+    elif state["status"] not in ("receiving", "failed"):
+        return None
+    if missing_parts(state):
+        return None
+
+    token = uuid.uuid4().hex
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return None  # another request/worker got there first
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+
+    state["status"] = "processing"
+    state["error"] = None
+    _save_state(state)
+    return token
+
+def _owns_lock(upload_id, token):
+    try:
+        with open(_lock_path(upload_id)) as f:
+            return f.read() == token
+    except FileNotFoundError:
+        return False
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _assemble(state, token):
+    upload_dir = _upload_dir(state["upload_id"])
+    # Token in the name so a slow former owner can't write over our copy
+    assembled_path = os.path.join(upload_dir, f"assembled_{token}.pdf")
+    digest = hashlib.sha256()
+    with open(assembled_path, "wb") as out:
+        for n in range(1, state["total_parts"] + 1):
+            with open(_part_path(state["upload_id"], n), "rb") as part:
+                data = part.read()
+            digest.update(data)
+            out.write(data)
+
+    if digest.hexdigest() != state["sha256"]:
+        # We can't tell which part is bad, so ask for all of them again
+        if _owns_lock(state["upload_id"], token):
+            for n in range(1, state["total_parts"] + 1):
+                _remove_quietly(_part_path(state["upload_id"], n))
+        raise UploadError("Integrity check failed (sha256 mismatch). Re-send all parts.")
+    return assembled_path
+
+def process_upload(upload_id, token):
+    """Assembles, verifies and ingests a claimed upload (runs as a background task).
+
+    `token` is what claim_processing wrote into the lock. If another worker took
+    the lock over meanwhile, this run leaves state.json, parts and lock alone.
+    """
+    state = load_state(upload_id)
+    upload_dir = _upload_dir(upload_id)
+    assembled_path = os.path.join(upload_dir, f"assembled_{token}.pdf")
+    print(f"📥 Processing chunked upload: {state['filename']} | Subject: {state['subject']} | Chapter: {state['chapter']}")
+
+    # Heartbeat so other workers can tell a long ingest from a dead one
+    stop_heartbeat = threading.Event()
+    def heartbeat():
+        while not stop_heartbeat.wait(LOCK_HEARTBEAT_SECONDS):
+            if not _owns_lock(upload_id, token):
+                return
+            try:
+                os.utime(_lock_path(upload_id))
+                os.utime(upload_dir)
+            except FileNotFoundError:
+                return
+    threading.Thread(target=heartbeat, daemon=True).start()
+
+    try:
+        _assemble(state, token)
+        result = ingest_pdf(assembled_path, state["subject"], state["chapter"], filename=state["filename"])
+        result = {"filename": result["filename"], "chunks": result["chunks"]}
+        cache.set("uploads", upload_id, result)
+
+        if not _owns_lock(upload_id, token):
+            print(f"⚠️ Lost processing lock for {state['filename']}; leaving cleanup to the new owner")
+            return
+
+        state["status"] = "done"
+        state["result"] = result
+        _save_state(state)
+
+        # Only state.json is kept, so late status checks still get the result
+        for n in range(1, state["total_parts"] + 1):
+            _remove_quietly(_part_path(upload_id, n))
+        _remove_quietly(_lock_path(upload_id))
+    except Exception as e:
+        print(f"❌ Chunked Upload Error: {e}")
+        if not _owns_lock(upload_id, token):
+            return
+        state["status"] = "failed"
+        state["error"] = str(e)
+        _save_state(state)
+        _remove_quietly(_lock_path(upload_id))
+    finally:
+        stop_heartbeat.set()
+        _remove_quietly(assembled_path)
@@ -0,0 +1,152 @@
+import os
+import re
+import time
+import pdfplumber
+from dotenv import load_dotenv
+
+# AI & Database Libraries
+import google.generativeai as genai
+from pinecone import Pinecone
+from supabase import create_client, Client
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from shared_cache import SharedCache
+
+# --- INGESTION CORE ---
+# Shared by the /upload endpoint (main.py), the interactive admin menu
+# (ingested_master.py) and the bulk CLI (bulk_ingest.py), so every path
+# produces the same chunk IDs and metadata.
+
+# --- 1. CONFIGURATION ---
+load_dotenv()
+
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+if not all([GOOGLE_API_KEY, PINECONE_API_KEY, SUPABASE_URL, SUPABASE_KEY]):
+    raise ValueError("❌ Missing API Keys! Check your .env file.")
+
+genai.configure(api_key=GOOGLE_API_KEY)
+
+INDEX_NAME = "cue2clarity"
+pc = Pinecone(api_key=PINECONE_API_KEY)
+index = pc.Index(INDEX_NAME)
+
+supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+BUCKET_NAME = "course materials (input)"
+
+EMBED_MODEL = "models/text-embedding-004"
+# Interactive paths (/chat, /upload) run inside the event loop, so they keep a
+# short retry budget; bulk_ingest.py passes a larger one.
+EMBED_RETRIES = 3
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+UPSERT_BATCH_SIZE = 100
+
+# 🗄️ SHARED CACHE (a local file: shared by the uvicorn workers of one machine only)
+# Clearing it below does not reach the server when a CLI runs elsewhere; the
+# short answer TTL in shared_cache.py bounds how long stale answers live there.
+cache = SharedCache()
+
+# --- 2. HELPERS ---
+def clean_and_repair_text(text):
+    if not text: return ""
+    replacements = {"\uf0e0": "->", "⇒": "=>", "→": "->", "–": "-", "•": "-"}
+    for bad, good in replacements.items():
+        text = text.replace(bad, good)
+    return re.sub(r'\s+', ' ', text).strip()
+
+def sanitize_filename(filename):
+    filename = re.sub(r'[^\x00-\x7f]', r'', filename)
+    filename = re.sub(r'[\s\[\]\(\)]+', '_', filename)
+    return filename.strip('_')
+
+def chunk_id(filename, i):
+    return f"{filename}_chunk_{i}"
+
+def embed_text_with_retry(text, retries=EMBED_RETRIES):
+    cache_key = SharedCache.make_key(EMBED_MODEL, "retrieval_document", text)
+    cached = cache.get("embeddings", cache_key)
+    if cached is not None:
+        return cached
+
+    for attempt in range(retries):
+        try:
+            result = genai.embed_content(
+                model=EMBED_MODEL,
+                content=text,
+                task_type="retrieval_document"
+            )
+            cache.set("embeddings", cache_key, result['embedding'])
+            return result['embedding']
+        except Exception as e:
+            if "429" in str(e):
+                time.sleep(2 ** attempt)
+            else:
+                raise e
+    raise Exception("Google API Busy: embedding failed after retries.")
+
+def upload_pdf_to_storage(file_path, filename):
+    """Uploads the local PDF to Supabase (overwriting) and returns its public URL."""
+    with open(file_path, "rb") as f:
+        supabase.storage.from_(BUCKET_NAME).upload(
+            path=filename,
+            file=f.read(),
+            file_options={"content-type": "application/pdf", "upsert": "true"}
+        )
+    return supabase.storage.from_(BUCKET_NAME).get_public_url(filename)
+
+def extract_text(file_path):
+    full_text = ""
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages:
+            t = page.extract_text()
+            if t: full_text += clean_and_repair_text(t) + "\n\n"
+    return full_text
+
+def split_text(full_text):
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    return text_splitter.split_text(full_text)
+
+# --- 3. INGESTION ---
+def ingest_pdf(file_path, subject, chapter, filename=None, embed_retries=EMBED_RETRIES):
+    """Uploads, chunks, embeds and indexes one PDF.
+
+    `filename` is the name stored in Supabase/Pinecone; it defaults to the
+    sanitized basename of `file_path`. Raises on any failure so callers can
+    decide whether to retry.
+    """
+    original_filename = filename or os.path.basename(file_path)
+    safe_filename = sanitize_filename(original_filename)
+
+    public_url = upload_pdf_to_storage(file_path, safe_filename)
+    chunks = split_text(extract_text(file_path))
+
+    vectors = []
+    for i, chunk in enumerate(chunks):
+        vectors.append({
+            "id": chunk_id(safe_filename, i),
+            "values": embed_text_with_retry(chunk, retries=embed_retries),
+            "metadata": {
+                "text": chunk,
+                "source": safe_filename,
+                "subject": subject,
+                "chapter": chapter,
+                "pdf_url": public_url,
+                "chunk_index": i
+            }
+        })
+
+    # Drop vectors from an earlier ingest of this file, including ones stored
+    # under the unsanitized name or the old {file}_{i} IDs, so a shorter or
+    # renamed re-ingest doesn't leave duplicate chunks behind.
+    index.delete(filter={"source": {"$in": sorted({safe_filename, original_filename})}})
+
+    for i in range(0, len(vectors), UPSERT_BATCH_SIZE):
+        index.upsert(vectors=vectors[i:i + UPSERT_BATCH_SIZE])
+
+    # New notes can change any answer, so drop the cached ones
+    cache.clear("answers")
+    return {"status": "success", "filename": safe_filename, "chunks": len(chunks), "pdf_url": public_url}
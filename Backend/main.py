@@ -1,11 +1,10 @@
 import os
-import time
-import shutil
+import hashlib
+import tempfile
 import uvicorn
 import re
 import sys
-import pdfplumber
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Header
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Header, Request, BackgroundTasks
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -14,32 +13,24 @@ from dotenv import load_dotenv
 
 # AI & Database Libraries
 import google.generativeai as genai
-from pinecone import Pinecone
-from supabase import create_client, Client
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from shared_cache import SharedCache
+from ingestion import (
+    index, supabase, cache, BUCKET_NAME,
+    embed_text_with_retry, ingest_pdf, sanitize_filename
+)
+import chunked_upload
+from chunked_upload import UploadError
 
 # --- 1. CONFIGURATION ---
 load_dotenv()
 
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 # 🔒 SIMPLE ADMIN PASSWORD
 ADMIN_SECRET = os.getenv("ADMIN_SECRET")
 
-if not all([GOOGLE_API_KEY, PINECONE_API_KEY, SUPABASE_URL, SUPABASE_KEY]):
-    raise ValueError("❌ Missing API Keys! Check your .env file.")
-
-genai.configure(api_key=GOOGLE_API_KEY)
+# API keys and clients are validated/configured in ingestion.py
 model = genai.GenerativeModel('models/gemini-2.5-flash-lite')
 
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index("cue2clarity")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-BUCKET_NAME = "course materials (input)"
-
 # 🔒 STRICTNESS SETTINGS
 SCORE_THRESHOLD = 0.35 
 
@@ -65,14 +56,14 @@ class DeleteTopicRequest(BaseModel):
 class NukeRequest(BaseModel):
     confirmation: str
 
-# --- 2. HELPERS ---
-def clean_and_repair_text(text):
-    if not text: return ""
-    replacements = {"\uf0e0": "->", "⇒": "=>", "→": "->", "–": "-", "•": "-"}
-    for bad, good in replacements.items():
-        text = text.replace(bad, good)
-    return re.sub(r'\s+', ' ', text).strip()
+class InitUploadRequest(BaseModel):
+    filename: str
+    subject: str = "General"
+    chapter: str = "General"
+    size: int
+    sha256: str
 
+# --- 2. HELPERS ---
 DIST_DIR = os.path.join(os.path.dirname(__file__), "../Front/Frontend/dist")
 print(f"🔍 DEBUG: Calculated DIST_DIR: {os.path.abspath(DIST_DIR)}")
 
@@ -113,28 +104,6 @@ else:
             }
         }
 
-def sanitize_filename(filename):
-    filename = re.sub(r'[^\x00-\x7f]', r'', filename)
-    filename = re.sub(r'[\s\[\]\(\)]+', '_', filename)
-    return filename.strip('_')
-
-def embed_text_with_retry(text):
-    retries = 3
-    for attempt in range(retries):
-        try:
-            result = genai.embed_content(
-                model="models/text-embedding-004",
-                content=text,
-                task_type="retrieval_document"
-            )
-            return result['embedding']
-        except Exception as e:
-            if "429" in str(e):
-                time.sleep(2 ** attempt)
-            else:
-                raise e
-    raise HTTPException(status_code=429, detail="Google API Busy")
-
 def clean_response_text(text):
     if not text: return ""
     return re.sub(r'[\ue000-\uf8ff]', '->', text).replace("→", "->")
@@ -213,6 +182,16 @@ PROMPT_TEMPLATES = {
 async def chat_endpoint(request: QueryRequest):
     print(f"\n📨 [{request.mode}] Question: {request.question} | Diff: {request.difficulty}")
     
+    mode = request.mode.upper()
+
+    # Quizzes are meant to vary between requests, so they are never cached
+    use_answer_cache = mode != "QUIZ"
+    answer_key = SharedCache.make_key(mode, request.difficulty, request.question.strip().lower())
+    if use_answer_cache:
+        cached = cache.get("answers", answer_key)
+        if cached is not None:
+            return cached
+
     try:
         query_vector = embed_text_with_retry(request.question)
         search_results = index.query(vector=query_vector, top_k=8, include_metadata=True)
@@ -244,16 +223,16 @@ async def chat_endpoint(request: QueryRequest):
         # --- 🧠 UPDATED PROMPT INJECTION ---
         final_user_input = request.question
         
-        if request.mode == "QUIZ":
+        if mode == "QUIZ":
             final_user_input = f"Generate 10 {request.difficulty}-level Multiple Choice Questions (MCQs) specifically about the topic: '{request.question}'. Ensure they are solvable using the provided context."
         
-        elif request.mode == "ASSIGNMENT":
+        elif mode == "ASSIGNMENT":
             final_user_input = f"I am working on an assignment about '{request.question}'. Please provide a Socratic hint or guiding question to help me solve it, but DO NOT give me the direct answer yet."
 
-        elif request.mode == "RSOC":
+        elif mode == "RSOC":
             final_user_input = f"Analyze the topic '{request.question}' using the RSOC (Recitation, Summary, Outline, Connection) format based strictly on the provided context."
 
-        base_prompt = PROMPT_TEMPLATES.get(request.mode.upper(), PROMPT_TEMPLATES["LECTURE"])
+        base_prompt = PROMPT_TEMPLATES.get(mode, PROMPT_TEMPLATES["LECTURE"])
         
         system_instruction = f"""
         {base_prompt}
@@ -264,7 +243,10 @@ async def chat_endpoint(request: QueryRequest):
         """
 
         response = model.generate_content(system_instruction)
-        return {"answer": clean_response_text(response.text), "sources": sources}
+        result = {"answer": clean_response_text(response.text), "sources": sources}
+        if use_answer_cache:
+            cache.set("answers", answer_key, result)
+        return result
 
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -279,52 +261,25 @@ async def upload_file(
     safe_filename = sanitize_filename(file.filename)
     print(f"📥 Uploading: {safe_filename} | Subject: {subject} | Chapter: {chapter}")
     
-    temp_filename = f"temp_{safe_filename}"
+    # Unique per request: several workers may receive the same filename at once
+    fd, temp_filename = tempfile.mkstemp(suffix=".pdf", prefix="upload_")
     
     try:
-        with open(temp_filename, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        with open(temp_filename, "rb") as f:
-            file_bytes = f.read()
-            supabase.storage.from_(BUCKET_NAME).upload(
-                path=safe_filename, 
-                file=file_bytes, 
-                file_options={"content-type": "application/pdf", "upsert": "true"}
-            )
-        
-        public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(safe_filename)
-
-        full_text = ""
-        with pdfplumber.open(temp_filename) as pdf:
-            for page in pdf.pages:
-                t = page.extract_text()
-                if t: full_text += clean_and_repair_text(t) + "\n\n"
-
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        chunks = text_splitter.split_text(full_text)
-        
-        vectors = []
-        for i, chunk in enumerate(chunks):
-            embedding = embed_text_with_retry(chunk)
-            vectors.append({
-                "id": f"{safe_filename}_chunk_{i}",
-                "values": embedding,
-                "metadata": {
-                    "text": chunk,
-                    "source": safe_filename,
-                    "subject": subject,
-                    "chapter": chapter,
-                    "pdf_url": public_url,
-                    "chunk_index": i
-                }
-            })
-
-        batch_size = 100
-        for i in range(0, len(vectors), batch_size):
-            index.upsert(vectors=vectors[i:i + batch_size])
-        
-        return {"status": "success", "filename": safe_filename, "chunks": len(chunks)}
+        digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as buffer:
+            for block in iter(lambda: file.file.read(1024 * 1024), b""):
+                digest.update(block)
+                buffer.write(block)
+
+        # Same bytes + labels already ingested: return the earlier result
+        upload_id = chunked_upload.upload_id_for(digest.hexdigest(), safe_filename, subject, chapter)
+        existing = cache.get("uploads", upload_id)
+        if existing is not None:
+            return {"status": "success", "filename": existing["filename"], "chunks": existing["chunks"]}
+
+        result = ingest_pdf(temp_filename, subject, chapter, filename=safe_filename)
+        cache.set("uploads", upload_id, {"filename": result["filename"], "chunks": result["chunks"]})
+        return {"status": "success", "filename": result["filename"], "chunks": result["chunks"]}
 
     except Exception as e:
         print(f"❌ Upload Error: {e}")
@@ -333,6 +288,43 @@ async def upload_file(
         if os.path.exists(temp_filename):
             os.remove(temp_filename)
 
+# --- RESUMABLE UPLOADS (see chunked_upload.py) ---
+
+@app.post("/upload/init")
+async def init_chunked_upload(request: InitUploadRequest):
+    """Starts (or resumes) an upload and lists the parts still missing."""
+    try:
+        return chunked_upload.init_upload(
+            request.filename, request.subject, request.chapter, request.size, request.sha256
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@app.put("/upload/{upload_id}/parts/{part_number}")
+async def upload_part(upload_id: str, part_number: int, request: Request, background_tasks: BackgroundTasks):
+    """Stores one raw part. Processing starts as soon as the last missing part lands."""
+    try:
+        data = await request.body()
+        summary = chunked_upload.write_part(upload_id, part_number, data)
+        token = None if summary["missing_parts"] else chunked_upload.claim_processing(upload_id)
+        if token:
+            background_tasks.add_task(chunked_upload.process_upload, upload_id, token)
+            summary["status"] = "processing"
+        return summary
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@app.post("/upload/{upload_id}/commit")
+async def commit_chunked_upload(upload_id: str, background_tasks: BackgroundTasks):
+    """Starts processing if needed and reports status; poll it until 'done' or 'failed'."""
+    try:
+        token = chunked_upload.claim_processing(upload_id)
+        if token:
+            background_tasks.add_task(chunked_upload.process_upload, upload_id, token)
+        return chunked_upload.summarize(chunked_upload.load_state(upload_id))
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
 # --- 5. ADMIN ENDPOINTS ---
 
 @app.delete("/admin/delete-topic")
@@ -348,6 +340,8 @@ async def delete_topic(request: DeleteTopicRequest, x_admin_secret: str = Header
     try:
         print(f"🗑️ ADMIN: Deleting topic '{target_subject}'...")
         index.delete(filter={"subject": target_subject})
+        cache.clear("answers")
+        cache.clear("uploads")
         return {"status": "success", "message": f"Deleted all memories for topic: {target_subject}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -364,6 +358,7 @@ async def nuke_system(request: NukeRequest, x_admin_secret: str = Header(None)):
     try:
         print("☢️ ADMIN: NUKING SYSTEM...")
         index.delete(delete_all=True)
+        cache.clear()
         
         files = supabase.storage.from_(BUCKET_NAME).list()
         if files:
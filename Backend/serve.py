@@ -0,0 +1,54 @@
+import os
+import uvicorn
+
+# --- MULTI-WORKER LAUNCHER ---
+# The endpoints in main.py make blocking Gemini/Pinecone calls, so one worker
+# handles one request at a time. Extra worker processes let requests overlap;
+# they share embeddings and answers through shared_cache.SharedCache.
+
+def available_cpus():
+    """CPUs this process may actually use: affinity mask, then the cgroup quota.
+
+    os.cpu_count() reports the host's cores, which inside a container is far
+    more than the instance is allowed to use.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        cpus = os.cpu_count() or 1
+
+    quota = None
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            q, period = f.read().split()
+        if q != "max":
+            quota = int(q) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                q = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if q > 0:
+                quota = q / period
+        except (OSError, ValueError):
+            pass
+
+    if quota is not None:
+        cpus = min(cpus, max(1, int(quota)))
+    return max(1, cpus)
+
+def default_workers():
+    """WEB_CONCURRENCY wins if set, otherwise (2 x usable CPUs) + 1, capped by MAX_WORKERS."""
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(1, int(os.getenv("WEB_CONCURRENCY")))
+    return max(1, min(2 * available_cpus() + 1, int(os.getenv("MAX_WORKERS", "8"))))
+
+if __name__ == "__main__":
+    host = os.getenv("HOST", "127.0.0.1")
+    port = int(os.getenv("PORT", "8000"))
+    workers = default_workers()
+    print(f"🚀 Starting Cue2Clarity on {host}:{port} with {workers} worker(s)")
+    uvicorn.run("main:app", host=host, port=port, workers=workers)
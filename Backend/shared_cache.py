@@ -0,0 +1,143 @@
+import os
+import time
+import json
+import hashlib
+import sqlite3
+import threading
+
+# --- SHARED CACHE (SQLite in WAL mode) ---
+# Every uvicorn worker is a separate process, so a plain dict would give each
+# worker its own cold cache. SQLite in WAL mode lets all workers on the same
+# machine read concurrently while one writes, with no extra service to run.
+
+CACHE_PATH = os.getenv("CACHE_PATH", os.path.join(os.path.dirname(__file__), "cache", "shared_cache.sqlite3"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))  # per namespace
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Answers depend on what is in Pinecone, which admin CLIs can change from
+# another machine without touching this cache, so they expire much sooner.
+# The same goes for "this upload was already ingested" records.
+CACHE_ANSWER_TTL_SECONDS = int(os.getenv("CACHE_ANSWER_TTL_SECONDS", "300"))
+CACHE_UPLOAD_TTL_SECONDS = int(os.getenv("CACHE_UPLOAD_TTL_SECONDS", "3600"))
+# A hit only refreshes `accessed_at` when it is older than this, so most reads
+# stay read-only and don't queue behind SQLite's single writer.
+CACHE_TOUCH_INTERVAL = int(os.getenv("CACHE_TOUCH_INTERVAL", "600"))
+# Eviction scans the table, so it runs once every N inserts per process
+CACHE_EVICT_EVERY = int(os.getenv("CACHE_EVICT_EVERY", "100"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache (namespace, accessed_at);
+"""
+
+class SharedCache:
+    """Small key/value cache shared by every worker process on one machine.
+
+    Values are stored as JSON. Entries expire after `ttl` seconds (or the
+    namespace's entry in `namespace_ttls`). Every `evict_every` inserts, all
+    namespaces are purged of expired rows and trimmed back to `max_entries`
+    (least recently used first), so they may briefly run slightly over.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS,
+                 touch_interval=CACHE_TOUCH_INTERVAL, evict_every=CACHE_EVICT_EVERY,
+                 namespace_ttls=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.namespace_ttls = namespace_ttls if namespace_ttls is not None else {
+            "answers": CACHE_ANSWER_TTL_SECONDS,
+            "uploads": CACHE_UPLOAD_TTL_SECONDS
+        }
+        self.touch_interval = touch_interval
+        self.evict_every = max(1, evict_every)
+        self._local = threading.local()
+        self._inserts = 0
+        self._inserts_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        # One connection per (process, thread): SQLite connections must not
+        # cross a fork, and the FastAPI threadpool may call us from any thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def ttl_for(self, namespace):
+        return self.namespace_ttls.get(namespace, self.ttl)
+
+    @staticmethod
+    def make_key(*parts):
+        raw = "\x1f".join(str(p) for p in parts)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, namespace, key):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, created_at, accessed_at FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        ttl = self.ttl_for(namespace)
+        if ttl and now - row[1] > ttl:
+            conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+            return None
+
+        if now - row[2] > self.touch_interval:
+            conn.execute(
+                "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key)
+            )
+        return json.loads(row[0])
+
+    def set(self, namespace, key, value):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, json.dumps(value), now, now)
+        )
+        with self._inserts_lock:
+            self._inserts += 1
+            due = self._inserts % self.evict_every == 0
+        if due:
+            for ns, in conn.execute("SELECT DISTINCT namespace FROM cache").fetchall():
+                self._evict(conn, ns)
+
+    def _evict(self, conn, namespace):
+        ttl = self.ttl_for(namespace)
+        if ttl:
+            conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND created_at < ?",
+                (namespace, time.time() - ttl)
+            )
+        if self.max_entries:
+            conn.execute(
+                """DELETE FROM cache WHERE namespace = ? AND key IN (
+                       SELECT key FROM cache WHERE namespace = ?
+                       ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (namespace, namespace, self.max_entries)
+            )
+
+    def clear(self, namespace=None):
+        conn = self._connect()
+        if namespace is None:
+            conn.execute("DELETE FROM cache")
+        else:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
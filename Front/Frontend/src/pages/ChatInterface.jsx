@@ -6,7 +6,7 @@ import {
     Send, MessageSquare, Paperclip, Plus, Settings, Menu, X, Trash2,
     LogOut, ChevronDown, BookOpen, GraduationCap, BarChart, FileText, Eye, EyeOff, Brain
 } from 'lucide-react';
-import api from '../services/api';
+import api, { uploadFileResumable } from '../services/api';
 
 // --- OPTIMIZED MESSAGE BUBBLES ---
 const RevealAnswer = React.memo(({ text }) => {
@@ -170,15 +170,11 @@ const ChatInterface = () => {
 
         try {
             if (uploadedFile) {
-                const formData = new FormData();
-                formData.append("file", uploadedFile);
-                formData.append("subject", uploadSubject || "General");
-                formData.append("chapter", uploadChapter || "General");
-
-                const uploadResponse = await api.post("/upload", formData, {
-                    headers: { "Content-Type": "multipart/form-data" }
-                });
-                const uploadData = uploadResponse.data;
+                const uploadData = await uploadFileResumable(
+                    uploadedFile,
+                    uploadSubject || "General",
+                    uploadChapter || "General"
+                );
 
                 setMessages(prev => [...prev, { id: prev.length + 2, text: `✅ Uploaded **${uploadData.filename}**!`, isUser: false, timestamp: new Date().toLocaleTimeString() }]);
                 setUploadedFile(null); setUploadSubject(''); setUploadChapter('');
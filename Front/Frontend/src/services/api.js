@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { Sha256 } from './sha256';
 
 const api = axios.create({
     baseURL: import.meta.env.VITE_API_URL || '', // Relative path for single-service deployment
@@ -53,4 +54,64 @@ api.interceptors.response.use(
     }
 );
 
+// --- Resumable chunked upload (see Backend/chunked_upload.py) ---
+const PART_TIMEOUT_MS = 60000;
+const PART_RETRIES = 3;
+const MAX_PROCESSING_WAIT_MS = 15 * 60 * 1000;
+
+const HASH_SLICE_SIZE = 4 * 1024 * 1024;
+
+// Hashes slice by slice so only HASH_SLICE_SIZE bytes are in memory at a time
+const sha256Hex = async (file) => {
+    const hash = new Sha256();
+    for (let offset = 0; offset < file.size; offset += HASH_SLICE_SIZE) {
+        hash.update(new Uint8Array(await file.slice(offset, offset + HASH_SLICE_SIZE).arrayBuffer()));
+    }
+    return hash.hex();
+};
+
+const sendPart = async (uploadId, partNumber, blob) => {
+    for (let attempt = 0; ; attempt++) {
+        try {
+            return await api.put(`/upload/${uploadId}/parts/${partNumber}`, blob, {
+                headers: { 'Content-Type': 'application/octet-stream' },
+                timeout: PART_TIMEOUT_MS,
+            });
+        } catch (error) {
+            // 4xx means the part itself is wrong, retrying won't help
+            if (attempt >= PART_RETRIES || (error.response && error.response.status < 500)) throw error;
+            await new Promise(resolve => setTimeout(resolve, Math.pow(2, attempt) * 1000));
+        }
+    }
+};
+
+// Init -> send missing parts -> commit, then poll commit until processing ends.
+// Calling it again for the same file only re-sends the parts the server lacks,
+// and a file that was already ingested returns immediately.
+export const uploadFileResumable = async (file, subject, chapter, onProgress = () => {}) => {
+    const sha256 = await sha256Hex(file);
+    let { data: upload } = await api.post('/upload/init', {
+        filename: file.name, subject, chapter, size: file.size, sha256,
+    });
+
+    // A 'failed' upload (e.g. integrity mismatch) lists the parts to re-send too
+    const missing = upload.missing_parts;
+    for (let i = 0; i < missing.length && ['receiving', 'failed'].includes(upload.status); i++) {
+        const n = missing[i];
+        const blob = file.slice((n - 1) * upload.part_size, n * upload.part_size);
+        upload = (await sendPart(upload.upload_id, n, blob)).data;
+        onProgress({ sentParts: i + 1, totalParts: missing.length });
+    }
+
+    const deadline = Date.now() + MAX_PROCESSING_WAIT_MS;
+    while (upload.status !== 'done') {
+        if (Date.now() > deadline) throw new Error('Upload is still processing. Try again in a few minutes.');
+        upload = (await api.post(`/upload/${upload.upload_id}/commit`)).data;
+        if (upload.status === 'failed') throw new Error(upload.error || 'Upload processing failed');
+        if (upload.status === 'receiving') throw new Error(`Server is missing parts: ${upload.missing_parts.join(', ')}`);
+        if (upload.status !== 'done') await new Promise(resolve => setTimeout(resolve, 2000));
+    }
+    return upload.result;
+};
+
 export default api;
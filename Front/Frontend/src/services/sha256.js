@@ -0,0 +1,77 @@
+// Incremental SHA-256. crypto.subtle.digest needs the whole input in memory at
+// once, which is too much for large lecture packs, so uploads hash slice by slice.
+
+const K = new Uint32Array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+]);
+
+const rotr = (x, n) => (x >>> n) | (x << (32 - n));
+
+export class Sha256 {
+    constructor() {
+        this.h = new Uint32Array([
+            0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+        ]);
+        this.w = new Uint32Array(64);
+        this.block = new Uint8Array(64);
+        this.blockLength = 0;
+        this.totalLength = 0;
+    }
+
+    compress(bytes, offset) {
+        const w = this.w;
+        for (let i = 0; i < 16; i++) {
+            const j = offset + i * 4;
+            w[i] = (bytes[j] << 24) | (bytes[j + 1] << 16) | (bytes[j + 2] << 8) | bytes[j + 3];
+        }
+        for (let i = 16; i < 64; i++) {
+            const s0 = rotr(w[i - 15], 7) ^ rotr(w[i - 15], 18) ^ (w[i - 15] >>> 3);
+            const s1 = rotr(w[i - 2], 17) ^ rotr(w[i - 2], 19) ^ (w[i - 2] >>> 10);
+            w[i] = (w[i - 16] + s0 + w[i - 7] + s1) | 0;
+        }
+
+        let [a, b, c, d, e, f, g, h] = this.h;
+        for (let i = 0; i < 64; i++) {
+            const t1 = (h + (rotr(e, 6) ^ rotr(e, 11) ^ rotr(e, 25)) + ((e & f) ^ (~e & g)) + K[i] + w[i]) | 0;
+            const t2 = ((rotr(a, 2) ^ rotr(a, 13) ^ rotr(a, 22)) + ((a & b) ^ (a & c) ^ (b & c))) | 0;
+            h = g; g = f; f = e; e = (d + t1) | 0;
+            d = c; c = b; b = a; a = (t1 + t2) | 0;
+        }
+        const out = this.h;
+        out[0] += a; out[1] += b; out[2] += c; out[3] += d;
+        out[4] += e; out[5] += f; out[6] += g; out[7] += h;
+    }
+
+    update(bytes) {
+        let i = 0;
+        this.totalLength += bytes.length;
+        if (this.blockLength > 0) {
+            while (i < bytes.length && this.blockLength < 64) this.block[this.blockLength++] = bytes[i++];
+            if (this.blockLength < 64) return this;
+            this.compress(this.block, 0);
+            this.blockLength = 0;
+        }
+        for (; i + 64 <= bytes.length; i += 64) this.compress(bytes, i);
+        while (i < bytes.length) this.block[this.blockLength++] = bytes[i++];
+        return this;
+    }
+
+    hex() {
+        const bitLength = this.totalLength * 8;
+        const padLength = this.blockLength < 56 ? 56 - this.blockLength : 120 - this.blockLength;
+        const tail = new Uint8Array(padLength + 8);
+        tail[0] = 0x80;
+        const view = new DataView(tail.buffer);
+        view.setUint32(padLength, Math.floor(bitLength / 0x100000000));
+        view.setUint32(padLength + 4, bitLength >>> 0);
+        this.update(tail);
+        return Array.from(this.h).map(x => x.toString(16).padStart(8, '0')).join('');
+    }
+}